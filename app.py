@@ -1,9 +1,11 @@
 #!/bin/env python3
+import startup_profile
 import os
 import streamlit as st
 from streamlit_chat import message
 from llama_index_agent import RagChat
 from config import Config
+from ingestion_queue import JobStatus
 
 st.set_page_config(page_title="RagChat")
 DATA_FOLDER = Config.DATA_PATH
@@ -26,9 +28,15 @@ def process_input():
 
 def update_sources():
     """Update the UI to display the current set of sources in the vector store."""
-    sources = st.session_state["assistant"].vector_store_manager.get_sources()
+    assistant = st.session_state["assistant"]
+    sources = assistant.vector_store_manager.get_sources(assistant.domain, all_domains=assistant.search_all_domains)
     st.session_state["sources"] = sources
 
+def update_domain():
+    st.session_state["assistant"].set_domain(st.session_state["domain"])
+    st.session_state["assistant"].set_search_all_domains(st.session_state["search_all_domains"])
+    update_sources()
+
 def read_and_save_file():
     os.makedirs(DATA_FOLDER, exist_ok=True)
     for file in st.session_state["file_uploader"]:
@@ -41,50 +49,97 @@ def read_and_save_file():
         with open(file_path, "wb") as f:
             f.write(file.getbuffer())
 
-        with st.session_state["ingestion_spinner"], st.spinner(f"Ingesting {file.name}"):
-            st.session_state["assistant"].ingestor.ingest_file(file_path)
-
-    update_sources()
+        st.session_state["assistant"].ingestor.submit_file(file_path, st.session_state["assistant"].domain)
 
 def ingest_url():
     url = st.session_state["url_input"].strip()
     if url:
-        try:
-            with st.session_state["ingestion_spinner"], st.spinner(f"Ingesting content from {url}"):
-                st.session_state["assistant"].ingestor.ingest_url(url)
-
-                update_sources()
-
-        except Exception as e:
-            st.error(f"Could not open the link: {e}")
+        st.session_state["assistant"].ingestor.submit_url(url, st.session_state["assistant"].domain)
+        st.session_state["url_input"] = ""
 
 def scan_data_folder():
     os.makedirs(DATA_FOLDER, exist_ok=True)
     existing_files = os.listdir(DATA_FOLDER)
     if existing_files:
+        # uploads are owned by their job, which knows their domain and may still be queued without any chunks;
+        # only files that never went through the queue and are missing everywhere go to the default domain
+        job_queue = st.session_state["assistant"].ingestor.job_queue
+        ingested = st.session_state["assistant"].vector_store_manager.get_sources(all_domains=True)
         for file_name in existing_files:
             file_path = os.path.join(DATA_FOLDER, file_name)
-            if not st.session_state["assistant"].vector_store_manager.vector_store.similarity_search(file_name, k=1):
-                st.session_state["assistant"].ingestor.ingest_file(file_path)
+            if file_path not in ingested and not job_queue.has_job(file_path):
+                st.session_state["assistant"].ingestor.submit_file(file_path)
 
     update_sources()
 
+def format_job(job):
+    parts = [f"**{job['status']}** {job['target']}"]
+    if job["domain"]:
+        parts.append(f"domain: {job['domain']}")
+    if job["pages_total"] or job["pages_parsed"]:
+        parts.append(f"pages parsed: {job['pages_parsed']}/{job['pages_total'] or '?'}")
+    if job["chunks_total"]:
+        parts.append(f"chunks embedded: {job['chunks_embedded']}/{job['chunks_total']}")
+    if job["eta"] is not None:
+        parts.append(f"ETA: {job['eta']:.0f}s")
+    if job["error"]:
+        parts.append(f"error: {job['error']}")
+    return " | ".join(parts)
+
+@st.fragment(run_every=Config.JOB_POLL_INTERVAL)
+def display_jobs_and_sources():
+    """Poll the ingestion queue without blocking the chat; reruns on its own every JOB_POLL_INTERVAL seconds."""
+    job_queue = st.session_state["assistant"].ingestor.job_queue
+    jobs = job_queue.get_jobs()
+    has_active_jobs = any(job["status"] in JobStatus.ACTIVE for job in jobs)
+
+    if jobs:
+        st.subheader("Ingestion jobs")
+        for job in jobs:
+            col_text, col_action = st.columns([5, 1])
+            col_text.markdown(format_job(job))
+            if job["status"] == JobStatus.RUNNING and job["chunks_total"]:
+                col_text.progress(job["chunks_embedded"] / job["chunks_total"])
+            if job["status"] in JobStatus.ACTIVE:
+                col_action.button("Cancel", key=f"cancel_{job['id']}", on_click=job_queue.cancel, args=(job["id"],))
+            elif job["status"] in (JobStatus.FAILED, JobStatus.CANCELLED):
+                col_action.button("Retry", key=f"retry_{job['id']}", on_click=job_queue.retry, args=(job["id"],))
+
+    # refresh sources while batches are landing, plus once more after the last job has finished
+    if has_active_jobs or st.session_state.get("jobs_were_active"):
+        update_sources()
+    st.session_state["jobs_were_active"] = has_active_jobs
+
+    st.subheader("Sources in Vector Store")
+    if st.session_state["sources"]:
+        for source in st.session_state["sources"]:
+            st.write(source)
+    else:
+        st.write("No sources found in the vector store.")
+
 def clear_database_and_move_files():
-    st.session_state["assistant"].clear()
+    try:
+        st.session_state["assistant"].clear()
+    except TimeoutError as e:
+        st.error(f"Could not clear the database: {e}")
+        return
     st.success("Database cleared and files moved to 'unused_data'.")
     update_sources()
 
 def page():
+    st.header("RagChat")
+    startup_profile.mark("first render")
+
     if "messages" not in st.session_state:
-        st.session_state["messages"] = []
-        st.session_state["assistant"] = RagChat()
-        st.session_state["ingestion_spinner"] = st.empty()
-        st.session_state["sources"] = []
-        scan_data_folder()
+        with st.spinner("Loading"):
+            st.session_state["messages"] = []
+            st.session_state["assistant"] = RagChat()
+            st.session_state["sources"] = []
+            scan_data_folder()
+        startup_profile.mark("assistant ready")
 
-    st.header("RagChat")
-    st.text_input("Domain", key="domain", placeholder="Enter domain")
-    st.session_state["assistant"].set_domain(st.session_state["domain"])
+    st.text_input("Domain", key="domain", placeholder="Enter domain", on_change=update_domain)
+    st.checkbox("Search all domains", key="search_all_domains", on_change=update_domain)
 
     st.subheader("Upload new document or provide a link")
 
@@ -105,19 +160,10 @@ def page():
         placeholder="Provide your link here",
     )
 
-    st.session_state["ingestion_spinner"] = st.empty()
-
-
     if st.button("Clear Database"):
         clear_database_and_move_files()
 
-
-    st.subheader("Sources in Vector Store")
-    if st.session_state["sources"]:
-        for source in st.session_state["sources"]:
-            st.write(source)
-    else:
-        st.write("No sources found in the vector store.")
+    display_jobs_and_sources()
 
     display_messages()
     st.text_input("Message", key="user_input", on_change=process_input)
@@ -0,0 +1,151 @@
+import re
+
+from config import Config
+
+# markdown headings (html headings are converted to these on ingestion), constitution-style
+# "Article. I." / "Section. 2." / "Amendment XIV" lines and all-caps lines of at least two words
+HEADING_PATTERN = re.compile(
+    r"^[ \t]*("
+    r"#{1,6}[ \t]+\S.*"
+    r"|(?:ARTICLE|Article)\.?[ \t]+[IVXLC]+\.?"
+    r"|(?:SECTION|Section)\.?[ \t]+\d+\.?"
+    r"|(?:AMENDMENT|Amendment)\.?[ \t]+[IVXLC]+\.?"
+    r"|[A-Z][A-Z'-]+(?:[ \t]+[A-Z][A-Z',-]*)+"
+    r")[ \t]*$",
+    re.MULTILINE
+)
+MAX_HEADING_LENGTH = 80
+
+
+def split_sections(text):
+    """
+    Split text into sections, each starting at a heading line.
+    Returns (heading, section_text) pairs; text before the first heading gets heading None.
+    """
+    starts = [m.start() for m in HEADING_PATTERN.finditer(text) if len(m.group(0).strip()) <= MAX_HEADING_LENGTH]
+    bounds = [0] + [start for start in starts if start > 0] + [len(text)]
+
+    sections = []
+    for start, end in zip(bounds, bounds[1:]):
+        section = text[start:end].strip()
+        if not section:
+            continue
+        first_line = section.splitlines()[0].strip()
+        heading = first_line.lstrip("#").strip() if HEADING_PATTERN.fullmatch(first_line) else None
+        sections.append((heading, section))
+    return sections
+
+
+class StructureChunker:
+    """
+    Token-aware chunker that keeps document structure intact.
+
+    Chunks never cross a page break (every pdf page is a separate document) and never cut a section in the middle:
+    whole sections are packed together while they fit into chunk_tokens embedding-model tokens, and only sections
+    larger than that are split further.
+    """
+
+    name = "structure"
+
+    def __init__(self, chunk_tokens=Config.CHUNK_TOKENS, overlap_tokens=Config.CHUNK_OVERLAP_TOKENS, tokenizer=None):
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+        from transformers import AutoTokenizer
+
+        self.tokenizer = tokenizer or AutoTokenizer.from_pretrained(Config.EMBEDDING_MODEL)
+        self.chunk_tokens = chunk_tokens
+        self.text_splitter = RecursiveCharacterTextSplitter.from_huggingface_tokenizer(
+            self.tokenizer, chunk_size=chunk_tokens, chunk_overlap=overlap_tokens
+        )
+
+    def count_tokens(self, text):
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def split_documents(self, documents):
+        chunks = []
+        for doc in documents:
+            for heading, text in self._pack_sections(split_sections(doc.page_content)):
+                metadata = {**doc.metadata, "chunker": self.name}
+                if heading:
+                    metadata["heading"] = heading
+                chunks.extend(self.text_splitter.create_documents([text], metadatas=[metadata]))
+        return chunks
+
+    def _pack_sections(self, sections):
+        packed = []
+        current_heading, current_text, current_tokens = None, "", 0
+        for heading, text in sections:
+            tokens = self.count_tokens(text)
+            if current_text and current_tokens + tokens <= self.chunk_tokens:
+                current_text += "\n\n" + text
+                current_tokens += tokens
+                continue
+            if current_text:
+                packed.append((current_heading, current_text))
+            current_heading, current_text, current_tokens = heading, text, tokens
+        if current_text:
+            packed.append((current_heading, current_text))
+        return packed
+
+
+class ParentChildChunker:
+    """
+    Splits documents into large structure-aware parent spans and small child chunks inside them.
+
+    Only the children are embedded and indexed; each child carries the id and text of its parent, which
+    VectorStoreManager stores separately and returns in place of the child on search.
+    """
+
+    name = "parent_child"
+
+    def __init__(self, parent_tokens=Config.PARENT_CHUNK_TOKENS, child_tokens=Config.CHILD_CHUNK_TOKENS,
+                 overlap_tokens=Config.CHUNK_OVERLAP_TOKENS, tokenizer=None):
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+        from transformers import AutoTokenizer
+
+        tokenizer = tokenizer or AutoTokenizer.from_pretrained(Config.EMBEDDING_MODEL)
+        self.parent_chunker = StructureChunker(parent_tokens, 0, tokenizer)
+        self.child_splitter = RecursiveCharacterTextSplitter.from_huggingface_tokenizer(
+            tokenizer, chunk_size=child_tokens, chunk_overlap=overlap_tokens
+        )
+
+    def split_documents(self, documents):
+        children = []
+        parent_indexes = {}
+        for parent in self.parent_chunker.split_documents(documents):
+            page_id = f"{parent.metadata.get('source')}:{parent.metadata.get('page')}"
+            parent_indexes[page_id] = parent_indexes.get(page_id, -1) + 1
+            parent_id = f"{page_id}:parent{parent_indexes[page_id]}"
+
+            for child in self.child_splitter.split_documents([parent]):
+                child.metadata["chunker"] = self.name
+                child.metadata["parent_id"] = parent_id
+                child.metadata["parent_content"] = parent.page_content
+                children.append(child)
+        return children
+
+
+class CharacterChunker:
+    """The original splitter, sized in characters and unaware of document structure."""
+
+    name = "character"
+
+    def __init__(self, chunk_size=1024, chunk_overlap=100):
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+        self.text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+    def split_documents(self, documents):
+        chunks = self.text_splitter.split_documents(documents)
+        for chunk in chunks:
+            chunk.metadata["chunker"] = self.name
+        return chunks
+
+
+def build_chunker(name=Config.CHUNKER):
+    if name == "character":
+        return CharacterChunker()
+    if name == "structure":
+        return StructureChunker()
+    if name == "parent_child":
+        return ParentChildChunker()
+    raise ValueError(f"Unknown chunker: {name}")
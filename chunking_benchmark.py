@@ -0,0 +1,62 @@
+import os
+import time
+
+from transformers import AutoTokenizer
+
+from chunking import build_chunker
+from config import Config
+from ingestion import Ingestor
+from rerank_eval import EVAL_QUERIES, is_hit
+from vector_store import HuggingFaceEmbeddingAdapter, VectorStoreManager
+
+CHUNKERS = ["character", "structure", "parent_child"]
+
+
+class ChunkingBenchmark:
+    """
+    Compares chunk count, ingest time and retrieval hit rate of the available chunkers on the constitution.
+
+    Hit rate alone favours chunkers that return more text (parent_child returns whole parent spans), so the
+    average size of the returned context in embedding-model tokens is reported next to it.
+    """
+
+    def __init__(self, k=Config.RAG_TOP_K):
+        self.k = k
+        self.pdf_path = os.path.join("test_data", "constitution.pdf")
+        # one embedding model for all chunkers, loaded up front so no ingest time includes loading it
+        self.embedding_function = HuggingFaceEmbeddingAdapter(Config.EMBEDDING_MODEL)
+        self.embedding_function.embedding_model
+        self.tokenizer = AutoTokenizer.from_pretrained(Config.EMBEDDING_MODEL)
+
+    def run_chunker(self, name):
+        # every chunker gets its own fresh collection so chunk ids do not collide
+        vector_store_manager = VectorStoreManager(f"{Config.TEST_DB_PATH}_{name}", self.embedding_function)
+        vector_store_manager.clear()
+        ingestor = Ingestor(vector_store_manager, chunker=build_chunker(name))
+
+        start = time.perf_counter()
+        ingestor.ingest_file(self.pdf_path)
+        ingest_time = time.perf_counter() - start
+
+        chunk_count = len(vector_store_manager.vector_store.get(include=[])["ids"])
+        hits = 0
+        context_tokens = 0
+        for query, phrase in EVAL_QUERIES.items():
+            results = vector_store_manager.similarity_search(query, k=self.k)
+            hits += is_hit(results, phrase)
+            context_tokens += sum(
+                len(self.tokenizer.encode(doc.page_content, add_special_tokens=False)) for doc, _ in results
+            )
+        return chunk_count, ingest_time, hits / len(EVAL_QUERIES), context_tokens / len(EVAL_QUERIES)
+
+    def run(self):
+        print(f"\nChunkers on {self.pdf_path}, hit rate over top-{self.k} for {len(EVAL_QUERIES)} queries:")
+        print("-------------")
+        for name in CHUNKERS:
+            chunk_count, ingest_time, hit_rate, context_tokens = self.run_chunker(name)
+            print(f"{name:<14} chunks: {chunk_count:<5} ingest: {ingest_time:6.1f} s  hit rate: {hit_rate:.2f}  "
+                  f"context: {context_tokens:6.0f} tokens/query")
+
+
+if __name__ == "__main__":
+    ChunkingBenchmark().run()
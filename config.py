@@ -4,6 +4,26 @@ class Config:
     DATA_PATH = "data"
     UNUSED_DATA_PATH = "unused_data"
     MODEL_NAME = "llama3.1"
+    EMBEDDING_MODEL = "BAAI/bge-base-en-v1.5"
+    CHUNKER = "structure"  # "character", "structure" or "parent_child"
+    CHUNK_TOKENS = 256
+    CHUNK_OVERLAP_TOKENS = 20
+    PARENT_CHUNK_TOKENS = 1024
+    CHILD_CHUNK_TOKENS = 128
+    INGEST_WORKERS = 2
+    INGEST_MAX_RETRIES = 2
+    INGEST_BATCH_SIZE = 64
+    JOB_POLL_INTERVAL = 2
+    JOB_CANCEL_TIMEOUT = 60
+    STARTUP_IMPORT_BUDGET_MS = 3000
+    RAG_TOP_K = 3
+    RERANK_ENABLED = False
+    RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES = 50
+    RERANK_TOP_K = 3
+    RERANK_BATCH_SIZE = 16
+    RERANK_LATENCY_BUDGET = 1.0
+    RERANK_CACHE_SIZE = 10000
     REQUEST_HEADERS = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 6.1; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) '
                       'Chrome/56.0.2924.76 Safari/537.36',
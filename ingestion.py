@@ -1,35 +1,91 @@
-import requests
-from bs4 import BeautifulSoup
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader
+import threading
 
+from chunking import build_chunker
 from config import Config
+from ingestion_queue import get_ingestion_queue
+from utils import normalize_domain
+
+
+def _no_progress(**counters):
+    pass
 
 
 class Ingestor:
-    def __init__(self, vector_store_manager):
+    def __init__(self, vector_store_manager, chunker=None):
         self.vector_store_manager = vector_store_manager
-        self.text_splitter = RecursiveCharacterTextSplitter(chunk_size=1024, chunk_overlap=100)
+        self._chunker = chunker
+        self._chunker_lock = threading.Lock()
+
+    @property
+    def chunker(self):
+        # building the default chunker loads a tokenizer, so it waits for the first document
+        with self._chunker_lock:
+            if self._chunker is None:
+                self._chunker = build_chunker()
+            return self._chunker
+
+    @property
+    def job_queue(self):
+        # only callers that submit or watch background jobs start the process-wide workers
+        return get_ingestion_queue(self, self.vector_store_manager.db_path + "_jobs.sqlite")
+
+    def submit_file(self, pdf_file_path, domain=None):
+        """Queue a pdf for background ingestion into the domain's partition and return the job id."""
+        return self.job_queue.submit("file", pdf_file_path, normalize_domain(domain))
+
+    def submit_url(self, url, domain=None):
+        """Queue a url for background ingestion into the domain's partition and return the job id."""
+        return self.job_queue.submit("url", url, normalize_domain(domain))
+
+    def discard(self, source, domain=None):
+        """Remove everything ingested from source into the domain's partition."""
+        self.vector_store_manager.delete_source(source, domain)
 
-    def ingest_file(self, pdf_file_path):
-        docs = PyPDFLoader(file_path=pdf_file_path).load()
-        chunks = self.text_splitter.split_documents(docs)
-        self.vector_store_manager.add_documents(chunks)
+    def ingest_file(self, pdf_file_path, progress=_no_progress, domain=None):
+        from langchain_community.document_loaders import PyPDFLoader
+
+        docs = []
+        for page in PyPDFLoader(file_path=pdf_file_path).lazy_load():
+            docs.append(page)
+            progress(pages_parsed=len(docs))
+        progress(pages_total=len(docs))
+
+        chunks = self.chunker.split_documents(docs)
+        self._add_chunks(chunks, progress, domain)
+
+    def ingest_url(self, url, progress=_no_progress, domain=None):
+        import requests
+        from bs4 import BeautifulSoup
+        from langchain_core.documents import Document
 
-    def ingest_url(self, url):
         response = requests.get(url, headers=Config.REQUEST_HEADERS, stream=True)
         response.raise_for_status()
 
         soup = BeautifulSoup(response.content, 'html.parser')
+        # mark headings so the chunker can keep sections together
+        for heading in soup.find_all(["h1", "h2", "h3", "h4", "h5", "h6"]):
+            heading.string = "#" * int(heading.name[1]) + " " + heading.get_text(" ", strip=True)
         texts = soup.get_text(separator="\n")
 
         # Check if there's any content to process
         if not texts.strip():
             raise Exception("Could not parse the text from url")
+        progress(pages_parsed=1, pages_total=1)
 
-        chunks = self.text_splitter.create_documents([texts])
         # add source for urls for (a) to be shown in ui; (b) for vector store to check if new or was already added
-        for chunk in chunks:
-            chunk.metadata["source"] = url
+        chunks = self.chunker.split_documents([Document(page_content=texts, metadata={"source": url})])
+
+        self._add_chunks(chunks, progress, domain)
+
+    def _add_chunks(self, chunks, progress, domain):
+        # chunks are written batch by batch, so queries already see the parts of a document that have landed
+        embedded = 0
+
+        def on_batch(batch_size, total):
+            nonlocal embedded
+            embedded += batch_size
+            progress(chunks_embedded=embedded, chunks_total=total)
 
-        self.vector_store_manager.add_documents(chunks)
+        self.vector_store_manager.add_documents(
+            chunks, batch_size=Config.INGEST_BATCH_SIZE, on_batch=on_batch, domain=domain
+        )
@@ -0,0 +1,254 @@
+import sqlite3
+import threading
+import time
+
+from config import Config
+from utils import normalize_domain
+
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    ACTIVE = (QUEUED, RUNNING)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+# one queue (and one set of workers) per jobs database in this process, shared by all streamlit sessions
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_ingestion_queue(ingestor, db_path):
+    """
+    Return the process-wide queue for db_path, creating it on first use.
+    Jobs left "running" by a previous process are queued again only at that point, never by later sessions.
+    """
+    with _queues_lock:
+        if db_path not in _queues:
+            queue = IngestionQueue(ingestor, db_path)
+            queue.requeue_orphaned_jobs()
+            queue.start()
+            _queues[db_path] = queue
+        return _queues[db_path]
+
+
+class IngestionQueue:
+    """
+    Persistent background queue for file and url ingestion.
+
+    Jobs are stored in a small sqlite database next to the vector store, so queued work survives a restart.
+    A fixed number of worker threads pick jobs up, report progress (pages parsed, chunks embedded) back into
+    the database and retry failed jobs up to max_retries times. The UI only ever reads from the database,
+    so polling it never blocks on ingestion. Use get_ingestion_queue() rather than creating queues directly,
+    so concurrency stays bounded by the workers of a single queue.
+    """
+
+    def __init__(self, ingestor, db_path, workers=Config.INGEST_WORKERS, max_retries=Config.INGEST_MAX_RETRIES):
+        self.ingestor = ingestor
+        self.workers = workers
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    domain TEXT,
+                    status TEXT NOT NULL,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    pages_parsed INTEGER NOT NULL DEFAULT 0,
+                    pages_total INTEGER,
+                    chunks_embedded INTEGER NOT NULL DEFAULT 0,
+                    chunks_total INTEGER,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+            """)
+            # databases created by earlier versions miss the newer columns
+            columns = [row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")]
+            if "domain" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN domain TEXT")
+            if "cancel_requested" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0")
+
+    def start(self):
+        for i in range(self.workers):
+            threading.Thread(target=self._worker_loop, name=f"ingestion-worker-{i}", daemon=True).start()
+
+    def requeue_orphaned_jobs(self):
+        """Queue jobs that were running when the app stopped again, unless they were being cancelled."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE status = ? AND cancel_requested = 1",
+                (JobStatus.CANCELLED, time.time(), JobStatus.RUNNING)
+            )
+            self._conn.execute("UPDATE jobs SET status = ? WHERE status = ?", (JobStatus.QUEUED, JobStatus.RUNNING))
+        self._wakeup.set()
+
+    def submit(self, kind, target, domain=None):
+        """
+        Queue a job of the given kind ("file" or "url") for the given domain and return its id.
+        If the same target is already queued or running for that domain, the id of that job is returned instead.
+        """
+        domain = normalize_domain(domain)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE target = ? AND domain IS ? AND status IN (?, ?)",
+                (target, domain, *JobStatus.ACTIVE)
+            ).fetchone()
+            if row:
+                return row["id"]
+            job_id = self._conn.execute(
+                "INSERT INTO jobs (kind, target, domain, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (kind, target, domain, JobStatus.QUEUED, time.time())
+            ).lastrowid
+        self._wakeup.set()
+        return job_id
+
+    def cancel(self, job_id):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (JobStatus.CANCELLED, time.time(), job_id, JobStatus.QUEUED)
+            )
+            # running jobs are stopped by whichever worker runs them at its next progress report
+            self._conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?", (job_id, JobStatus.RUNNING)
+            )
+
+    def cancel_all(self, timeout=Config.JOB_CANCEL_TIMEOUT):
+        """Cancel every active job and wait until no worker is writing anymore."""
+        for job in self.get_jobs():
+            if job["status"] in JobStatus.ACTIVE:
+                self.cancel(job["id"])
+
+        deadline = time.time() + timeout
+        while any(job["status"] == JobStatus.RUNNING for job in self.get_jobs()):
+            if time.time() > deadline:
+                raise TimeoutError("Ingestion jobs did not stop in time")
+            time.sleep(0.1)
+
+    def retry(self, job_id):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, cancel_requested = 0, attempts = 0, error = NULL, finished_at = NULL "
+                "WHERE id = ? AND status IN (?, ?)",
+                (JobStatus.QUEUED, job_id, JobStatus.FAILED, JobStatus.CANCELLED)
+            )
+        self._wakeup.set()
+
+    def get_jobs(self):
+        """Return all jobs, newest first, with an "eta" in seconds for running jobs (None if unknown)."""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM jobs ORDER BY id DESC").fetchall()
+
+        now = time.time()
+        jobs = []
+        for row in rows:
+            job = dict(row)
+            job["eta"] = None
+            # estimate the remaining time from the embedding rate observed so far
+            if job["status"] == JobStatus.RUNNING and job["chunks_total"] and job["chunks_embedded"]:
+                elapsed = now - job["started_at"]
+                remaining = job["chunks_total"] - job["chunks_embedded"]
+                job["eta"] = elapsed / job["chunks_embedded"] * remaining
+            jobs.append(job)
+        return jobs
+
+    def has_job(self, target):
+        """True if target was ever submitted, in any domain and whatever the job's state."""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM jobs WHERE target = ? LIMIT 1", (target,)).fetchone() is not None
+
+    def has_active_jobs(self):
+        return any(job["status"] in JobStatus.ACTIVE for job in self.get_jobs())
+
+    def _claim_next(self):
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY id", (JobStatus.QUEUED,)
+            ).fetchall()
+            for row in rows:
+                # the status check makes the claim atomic against other connections to the same database
+                claimed = self._conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, started_at = ?, "
+                    "pages_parsed = 0, pages_total = NULL, chunks_embedded = 0, chunks_total = NULL "
+                    "WHERE id = ? AND status = ?",
+                    (JobStatus.RUNNING, time.time(), row["id"], JobStatus.QUEUED)
+                ).rowcount
+                if claimed:
+                    return dict(row)
+            return None
+
+    def _cancel_requested(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row is None or bool(row["cancel_requested"])
+
+    def _update(self, job_id, **fields):
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def _worker_loop(self):
+        while True:
+            job = self._claim_next()
+            if job is None:
+                self._wakeup.wait(timeout=1.0)
+                self._wakeup.clear()
+                continue
+            self._run(job)
+
+    def _run(self, job):
+        job_id = job["id"]
+
+        def progress(**counters):
+            if self._cancel_requested(job_id):
+                raise JobCancelled()
+            self._update(job_id, **counters)
+
+        try:
+            if job["kind"] == "url":
+                self.ingestor.ingest_url(job["target"], progress=progress, domain=job["domain"])
+            else:
+                self.ingestor.ingest_file(job["target"], progress=progress, domain=job["domain"])
+        except JobCancelled:
+            self._discard(job)
+            self._update(job_id, status=JobStatus.CANCELLED, finished_at=time.time())
+        except Exception as e:
+            print(f"Ingestion of {job['target']} failed: {e}")
+            if self._cancel_requested(job_id):
+                # a cancel that arrived before the failure must not be undone by a retry
+                self._discard(job)
+                self._update(job_id, status=JobStatus.CANCELLED, error=str(e), finished_at=time.time())
+            # attempts was incremented on claim, so compare with the value before it
+            elif job["attempts"] < self.max_retries:
+                self._update(job_id, status=JobStatus.QUEUED, error=str(e))
+                self._wakeup.set()
+            else:
+                self._discard(job)
+                self._update(job_id, status=JobStatus.FAILED, error=str(e), finished_at=time.time())
+        else:
+            self._update(job_id, status=JobStatus.DONE, error=None, finished_at=time.time())
+
+    def _discard(self, job):
+        # batches that already landed would otherwise stay searchable as a truncated document
+        try:
+            self.ingestor.discard(job["target"], job["domain"])
+        except Exception as e:
+            print(f"Could not remove partial chunks of {job['target']}: {e}")
@@ -1,36 +1,67 @@
-import numexpr
-from langchain_community.tools import DuckDuckGoSearchResults
-from llama_index.core import PromptTemplate
-from llama_index.core.agent import ReActAgent
-from llama_index.core.memory import ChatMemoryBuffer
-from llama_index.core.tools import FunctionTool
-from llama_index.llms.ollama import Ollama
-from transformers import pipeline
-
 from config import Config
 from ingestion import Ingestor
-from utils import normalize_numbers, _build_context
+from utils import normalize_numbers, normalize_domain, _build_context
 from prompt import llama_index_prompt
 from relevance_checker import is_query_relevant
+from reranker import CrossEncoderReranker
 from vector_store import VectorStoreManager
 
 class RagChat:
-    def __init__(self, db_path=Config.DB_PATH):
-        web_search_tool = FunctionTool.from_defaults(fn=self.web_search)
-        rag_search_tool = FunctionTool.from_defaults(fn=self.rag_search)
-        math_solver_tool = FunctionTool.from_defaults(fn=self.solve_math)
-        memory = ChatMemoryBuffer.from_defaults(token_limit=1500)
-        llm = Ollama(model=Config.MODEL_NAME, request_timeout=120.0)
-        self.agent = ReActAgent.from_tools([rag_search_tool, web_search_tool, math_solver_tool], llm=llm, verbose=True,
-                                      max_iterations=20,timeout=None,chat_history=None,memory=memory)
-
-        self.agent.update_prompts({"agent_worker:system_prompt": PromptTemplate(llama_index_prompt)})
-        self.agent.reset()
+    # the agent, the web search tool, the reranker and the classifier pull in heavy dependencies,
+    # so they are only imported and built when a session first uses them
+
+    def __init__(self, db_path=Config.DB_PATH, use_reranker=Config.RERANK_ENABLED):
         self.vector_store_manager = VectorStoreManager(db_path)
         self.ingestor = Ingestor(self.vector_store_manager)
-        self.duck_duck_go_search = DuckDuckGoSearchResults()
+        self.use_reranker = use_reranker
         self.domain = None
-        self.classifier = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
+        self.search_all_domains = False
+        self._reranker = None
+        self._agent = None
+        self._duck_duck_go_search = None
+        self._classifier = None
+
+    @property
+    def agent(self):
+        if self._agent is None:
+            from llama_index.core import PromptTemplate
+            from llama_index.core.agent import ReActAgent
+            from llama_index.core.memory import ChatMemoryBuffer
+            from llama_index.core.tools import FunctionTool
+            from llama_index.llms.ollama import Ollama
+
+            web_search_tool = FunctionTool.from_defaults(fn=self.web_search)
+            rag_search_tool = FunctionTool.from_defaults(fn=self.rag_search)
+            math_solver_tool = FunctionTool.from_defaults(fn=self.solve_math)
+            memory = ChatMemoryBuffer.from_defaults(token_limit=1500)
+            llm = Ollama(model=Config.MODEL_NAME, request_timeout=120.0)
+            agent = ReActAgent.from_tools([rag_search_tool, web_search_tool, math_solver_tool], llm=llm, verbose=True,
+                                          max_iterations=20,timeout=None,chat_history=None,memory=memory)
+
+            agent.update_prompts({"agent_worker:system_prompt": PromptTemplate(llama_index_prompt)})
+            agent.reset()
+            self._agent = agent
+        return self._agent
+
+    @property
+    def duck_duck_go_search(self):
+        if self._duck_duck_go_search is None:
+            from langchain_community.tools import DuckDuckGoSearchResults
+            self._duck_duck_go_search = DuckDuckGoSearchResults()
+        return self._duck_duck_go_search
+
+    @property
+    def reranker(self):
+        if self._reranker is None:
+            self._reranker = CrossEncoderReranker()
+        return self._reranker
+
+    @property
+    def classifier(self):
+        if self._classifier is None:
+            from transformers import pipeline
+            self._classifier = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
+        return self._classifier
 
     def web_search(self, request: str):
         """Runs web search and gets information about the query.
@@ -46,7 +77,16 @@ class RagChat:
         Use data fetched from this tool to answer the question.
         """
         print("\n----RUNNING RAG SEARCH for " + query + "----")
-        results = self.vector_store_manager.similarity_search(query, k=3)
+        if self.use_reranker:
+            # over-fetch candidates and let the cross-encoder pick the few that go into the prompt
+            candidates = self.vector_store_manager.similarity_search(
+                query, k=Config.RERANK_CANDIDATES, domain=self.domain, all_domains=self.search_all_domains
+            )
+            results = self.reranker.rerank(query, candidates, top_k=Config.RERANK_TOP_K)
+        else:
+            results = self.vector_store_manager.similarity_search(
+                query, k=Config.RAG_TOP_K, domain=self.domain, all_domains=self.search_all_domains
+            )
         context = _build_context(results)
         return context
 
@@ -74,6 +114,8 @@ class RagChat:
         - Maintain Full Precision:
         Always treat every number as exact (i.e., full numbers without rounding or abbreviations) unless the query explicitly requests rounding.
         """
+        import numexpr
+
         try:
             result = numexpr.evaluate(expression)
             return str(result)
@@ -82,18 +124,28 @@ class RagChat:
             return f"Error evaluating expression: {str(e)}"
 
     def set_domain(self, domain):
+        domain = normalize_domain(domain)
         if self.domain == domain:
             return
         self.domain = domain
 
+    def set_search_all_domains(self, search_all_domains):
+        self.search_all_domains = search_all_domains
+
     def ask(self, query: str):
+        # built outside the try, so a broken llama_index or ollama install is not reported as a connection issue
+        agent = self.agent
         try:
-            if "yes" not in is_query_relevant(self.domain, query, self.agent.memory.get_all()):
+            if "yes" not in is_query_relevant(self.domain, query, agent.memory.get_all()):
                 return "I am afraid your query is not related to the domain you specified. Please change either the domain or the question."
-            return self.agent.chat(normalize_numbers(query)).response
+            return agent.chat(normalize_numbers(query)).response
+        except ImportError:
+            raise
         except Exception as e:
             return "There was an issue connecting to the model service. Please make sure ollama is running and try again later."
 
 
     def clear(self):
+        # workers must have stopped writing before the collections are reset
+        self.ingestor.job_queue.cancel_all()
         self.vector_store_manager.clear()
@@ -0,0 +1,86 @@
+import random
+import time
+
+from config import Config
+from rerank_eval import EVAL_QUERIES
+from vector_store import VectorStoreManager
+
+DOMAIN_COUNT = 4
+CHUNKS_PER_DOMAIN = [1_000, 10_000, 25_000]
+EMBEDDING_DIMENSIONS = 768  # BAAI/bge-base-en-v1.5
+INSERT_BATCH_SIZE = 5_000
+K = Config.RAG_TOP_K
+
+
+class PartitionBenchmark:
+    """
+    Measures search latency of a single domain partition against searching every partition at realistic corpus sizes.
+
+    The corpus is made of random unit vectors written straight into the collections: search latency depends on the
+    number of indexed vectors, not on their text, and this avoids embedding hundreds of thousands of chunks first.
+    Searches go through VectorStoreManager.similarity_search, so the timings include everything the agent pays
+    for: embedding the query, listing the partitions, merging their results and expanding parent spans.
+    """
+
+    def __init__(self):
+        self.domains = [f"domain {i}" for i in range(DOMAIN_COUNT)]
+
+    @staticmethod
+    def _random_vectors(count):
+        vectors = []
+        for _ in range(count):
+            vector = [random.gauss(0, 1) for _ in range(EMBEDDING_DIMENSIONS)]
+            norm = sum(x * x for x in vector) ** 0.5
+            vectors.append([x / norm for x in vector])
+        return vectors
+
+    def populate(self, vector_store_manager, chunks_per_domain):
+        for domain in self.domains:
+            collection = vector_store_manager.get_collection(domain)._collection
+            for start in range(0, chunks_per_domain, INSERT_BATCH_SIZE):
+                count = min(INSERT_BATCH_SIZE, chunks_per_domain - start)
+                ids = [f"{domain}:{start + i}" for i in range(count)]
+                collection.add(
+                    ids=ids,
+                    embeddings=self._random_vectors(count),
+                    documents=ids,
+                    metadatas=[{"source": "benchmark", "domain": domain}] * count
+                )
+
+    @staticmethod
+    def _time_ms(search, queries):
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            search(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        return sum(latencies) / len(latencies), latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def run_size(self, chunks_per_domain):
+        vector_store_manager = VectorStoreManager(f"{Config.TEST_DB_PATH}_partitions_{chunks_per_domain}")
+        vector_store_manager.clear()
+        self.populate(vector_store_manager, chunks_per_domain)
+
+        def search_partition(query):
+            return vector_store_manager.similarity_search(query, k=K, domain=self.domains[0])
+
+        def search_all(query):
+            return vector_store_manager.similarity_search(query, k=K, all_domains=True)
+
+        # warm up the embedding model and the indexes so loading them from disk is not timed
+        self._time_ms(search_all, EVAL_QUERIES)
+        return self._time_ms(search_partition, EVAL_QUERIES), self._time_ms(search_all, EVAL_QUERIES)
+
+    def run(self):
+        print(f"\nSearch latency (top-{K}) with {DOMAIN_COUNT} domains, {len(EVAL_QUERIES)} queries:")
+        print("-------------")
+        for chunks_per_domain in CHUNKS_PER_DOMAIN:
+            (partition_mean, partition_p95), (all_mean, all_p95) = self.run_size(chunks_per_domain)
+            print(f"{chunks_per_domain:>7} chunks/domain  "
+                  f"one domain: {partition_mean:6.1f} ms (p95 {partition_p95:6.1f})  "
+                  f"all {DOMAIN_COUNT * chunks_per_domain:>7} chunks: {all_mean:6.1f} ms (p95 {all_p95:6.1f})")
+
+
+if __name__ == "__main__":
+    PartitionBenchmark().run()
@@ -1,10 +1,11 @@
 import os
 
-from llama_index.llms.ollama import Ollama
 from config import Config
-from llama_index.core.base.llms.types import MessageRole
 
 def is_query_relevant(domain, query, chat_history_messages):
+    from llama_index.core.base.llms.types import MessageRole
+    from llama_index.llms.ollama import Ollama
+
     try:
         files = os.listdir(Config.DATA_PATH)
     except Exception:
@@ -0,0 +1,89 @@
+import os
+import re
+import time
+
+from config import Config
+from ingestion import Ingestor
+from reranker import CrossEncoderReranker
+from vector_store import VectorStoreManager
+
+# question -> phrase that a retrieved chunk has to contain to count as a hit
+EVAL_QUERIES = {
+    "What is the purpose of the United States Constitution according to the Preamble?": "more perfect Union",
+    "Who holds the executive power according to Article II, Section 1?": "executive Power shall be vested in a President",
+    "What does Amendment XIII of the Constitution abolish?": "Neither slavery nor involuntary servitude",
+    "Where is the judicial power of the United States vested?": "one supreme Court",
+    "What right does Amendment XIX of the Constitution guarantee?": "on account of sex",
+    "How many senators does each state have?": "two Senators from each State",
+    "How old must a person be to become President?": "thirty five Years",
+    "What does the First Amendment say about religion?": "respecting an establishment of religion",
+    "What does the Second Amendment protect?": "keep and bear Arms",
+    "How old must a member of the House of Representatives be?": "twenty five Years",
+}
+
+
+def _normalize(text):
+    return re.sub(r"\s+", " ", text).lower()
+
+
+def is_hit(results, phrase):
+    """True if any of the retrieved (document, score) pairs contains the phrase, ignoring case and line breaks."""
+    return any(_normalize(phrase) in _normalize(doc.page_content) for doc, _ in results)
+
+
+class RerankEval:
+    """Compares recall@k and latency of rag_search with the cross-encoder reranker on and off."""
+
+    def __init__(self, k=Config.RERANK_TOP_K):
+        self.k = k
+        self.vector_store_manager = VectorStoreManager(Config.TEST_DB_PATH)
+        self.ingestor = Ingestor(self.vector_store_manager)
+        self.reranker = CrossEncoderReranker()
+        self.test_data_folder = "test_data"
+
+    def setup_test_environment(self):
+        self.ingestor.ingest_file(os.path.join(self.test_data_folder, "constitution.pdf"))
+        # load the embedding model and run both models once, so the first timed query pays for neither
+        self.vector_store_manager.embedding_model
+        self.search("warm up", use_reranker=True)
+
+    def search(self, query, use_reranker):
+        if use_reranker:
+            candidates = self.vector_store_manager.similarity_search(query, k=Config.RERANK_CANDIDATES)
+            return self.reranker.rerank(query, candidates, top_k=self.k)
+        return self.vector_store_manager.similarity_search(query, k=self.k)
+
+    def evaluate(self, use_reranker):
+        hits = 0
+        latencies = []
+        for query, phrase in EVAL_QUERIES.items():
+            start = time.perf_counter()
+            results = self.search(query, use_reranker)
+            latencies.append(time.perf_counter() - start)
+            if is_hit(results, phrase):
+                hits += 1
+        latencies.sort()
+        return {
+            "recall": hits / len(EVAL_QUERIES),
+            "mean_ms": sum(latencies) / len(latencies) * 1000,
+            "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+        }
+
+    def run(self):
+        self.setup_test_environment()
+
+        print(f"\nRecall@{self.k} and latency over {len(EVAL_QUERIES)} queries:")
+        print("-------------")
+        for name, use_reranker in [("vector search only", False), ("with reranker", True)]:
+            result = self.evaluate(use_reranker)
+            print(f"{name:<20} recall@{self.k}: {result['recall']:.2f}  "
+                  f"mean: {result['mean_ms']:.1f} ms  p95: {result['p95_ms']:.1f} ms")
+
+        # second pass is served from the (query, chunk id) score cache
+        result = self.evaluate(True)
+        print(f"{'reranker, cached':<20} recall@{self.k}: {result['recall']:.2f}  "
+              f"mean: {result['mean_ms']:.1f} ms  p95: {result['p95_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    RerankEval().run()
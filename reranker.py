@@ -0,0 +1,68 @@
+import time
+from collections import OrderedDict
+
+from config import Config
+
+
+class CrossEncoderReranker:
+    """
+    Second retrieval stage: rescores the vector store candidates with a small cross-encoder running on cpu.
+
+    Candidates are scored in batches until the latency budget is spent; candidates that were not scored in time
+    keep their vector store order behind the scored ones. Scores are cached per (query, chunk id), so the agent
+    repeating a search does not pay for the model again.
+    """
+
+    def __init__(self, model_name=Config.RERANK_MODEL, batch_size=Config.RERANK_BATCH_SIZE,
+                 latency_budget=Config.RERANK_LATENCY_BUDGET, cache_size=Config.RERANK_CACHE_SIZE, model=None):
+        if model is None:
+            from sentence_transformers import CrossEncoder
+            model = CrossEncoder(model_name, device="cpu")
+
+        self.model = model
+        self.batch_size = batch_size
+        self.latency_budget = latency_budget
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+
+    def rerank(self, query, results, top_k=Config.RERANK_TOP_K):
+        """
+        Rerank (document, distance) pairs returned by similarity_search.
+        Returns the best top_k as (document, cross-encoder score) pairs.
+        """
+        deadline = time.perf_counter() + self.latency_budget
+
+        scores = {}
+        to_score = []
+        for i, (doc, _) in enumerate(results):
+            key = (query, self._chunk_id(doc))
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                scores[i] = self.cache[key]
+            else:
+                to_score.append(i)
+
+        for start in range(0, len(to_score), self.batch_size):
+            # always score the first batch, afterwards stop as soon as the budget is spent
+            if start and time.perf_counter() > deadline:
+                print(f"Reranker latency budget exceeded, {len(to_score) - start} candidates left unscored")
+                break
+            batch = to_score[start:start + self.batch_size]
+            batch_scores = self.model.predict([(query, results[i][0].page_content) for i in batch])
+            for i, score in zip(batch, batch_scores):
+                scores[i] = float(score)
+                self._cache_score((query, self._chunk_id(results[i][0])), scores[i])
+
+        scored = sorted(scores, key=lambda i: scores[i], reverse=True)
+        unscored = [i for i in range(len(results)) if i not in scores]
+        return [(results[i][0], scores.get(i)) for i in (scored + unscored)[:top_k]]
+
+    def _cache_score(self, key, score):
+        self.cache[key] = score
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    @staticmethod
+    def _chunk_id(doc):
+        # chunks added through VectorStoreManager always carry an id, fall back to the content otherwise
+        return doc.metadata.get("id") or doc.page_content
@@ -0,0 +1,93 @@
+import os
+import re
+import subprocess
+import sys
+import time
+
+from config import Config
+
+# imported first by app.py, so this is as close to the start of the app as python code gets
+PROCESS_START = time.perf_counter()
+
+PROJECT_MODULES = ["config", "utils", "prompt", "ingestion_queue", "chunking", "reranker", "relevance_checker",
+                   "vector_store", "ingestion", "llama_index_agent", "app"]
+
+# packages that must only be imported by the code path that needs them, never while the page starts up
+DEFERRED_PACKAGES = ["transformers", "torch", "sentence_transformers", "numexpr", "llama_index", "chromadb",
+                     "langchain_chroma", "langchain_community", "langchain", "bs4", "pypdf", "duckduckgo_search"]
+
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+_marks = {}
+
+
+def mark(label):
+    """Record and print the time since startup the first time label is reached in this process."""
+    if label not in _marks:
+        _marks[label] = time.perf_counter() - PROCESS_START
+        print(f"[startup] {label}: {_marks[label] * 1000:.0f} ms")
+    return _marks[label]
+
+
+def import_times(module):
+    """
+    Import module in a fresh interpreter with -X importtime.
+    Returns {imported module: (cumulative microseconds, nesting depth)}.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Could not import {module}:\n{result.stderr.splitlines()[-1]}")
+
+    times = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            times[match.group(4)] = (int(match.group(2)), (len(match.group(3)) - 1) // 2)
+    return times
+
+
+def run(top=10):
+    """Print the import time of every project module and check the app import against the budget."""
+    print("\nImport time per module (fresh interpreter, cumulative):")
+    print("-------------")
+    app_times = {}
+    for module in PROJECT_MODULES:
+        try:
+            times = import_times(module)
+        except RuntimeError as e:
+            print(f"{module:<20} failed: {e}")
+            continue
+        print(f"{module:<20} {times[module][0] / 1000:8.1f} ms")
+        if module == "app":
+            app_times = times
+
+    if not app_times:
+        return False
+
+    print("\nHeaviest top-level imports of app:")
+    print("-------------")
+    top_level = [(name, us) for name, (us, depth) in app_times.items() if depth <= 1 and name != "app"]
+    for name, us in sorted(top_level, key=lambda item: item[1], reverse=True)[:top]:
+        print(f"{name:<30} {us / 1000:8.1f} ms")
+
+    ok = True
+    eager = sorted({name.split(".")[0] for name in app_times} & set(DEFERRED_PACKAGES))
+    if eager:
+        print(f"\nImported at startup but should be deferred: {', '.join(eager)}")
+        ok = False
+
+    app_ms = app_times["app"][0] / 1000
+    if app_ms > Config.STARTUP_IMPORT_BUDGET_MS:
+        print(f"\nImporting app took {app_ms:.0f} ms, over the budget of {Config.STARTUP_IMPORT_BUDGET_MS} ms")
+        ok = False
+
+    if ok:
+        print("\nStartup is within budget.")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run() else 1)
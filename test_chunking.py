@@ -0,0 +1,24 @@
+from chunking import split_sections
+
+
+def test_constitution_headings_start_sections():
+    text = "We the People\n\nArticle. I.\nSection. 1.\nAll legislative Powers\nSection. 2.\nThe House\nAmendment XIV\nAll persons"
+
+    headings = [heading for heading, _ in split_sections(text)]
+    assert headings == [None, "Article. I.", "Section. 1.", "Section. 2.", "Amendment XIV"]
+
+
+def test_markdown_and_all_caps_headings():
+    sections = split_sections("## Rules\nbody\nTHE CONSTITUTION\nmore")
+
+    assert sections == [("Rules", "## Rules\nbody"), ("THE CONSTITUTION", "THE CONSTITUTION\nmore")]
+
+
+def test_wrapped_prose_is_not_a_heading():
+    text = ("No Person shall be a Senator who shall not have attained\n"
+            "Section 2 of this Article shall not apply, as the\n"
+            "Amendment may provide, to the\n"
+            "U.S.A.\n"
+            "Article of Confederation")
+
+    assert split_sections(text) == [(None, text)]
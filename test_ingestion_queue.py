@@ -0,0 +1,222 @@
+import threading
+import time
+
+from ingestion_queue import IngestionQueue, JobStatus
+
+
+class FakeIngestor:
+    """Reports a few progress steps per job instead of parsing and embedding anything."""
+
+    def __init__(self, steps=4, delay=0.05, failures=0, fail_when_released=None):
+        self.steps = steps
+        self.delay = delay
+        self.failures = failures
+        # an Event: the job blocks after its first progress report and fails once the event is set
+        self.fail_when_released = fail_when_released
+        self.runs = []
+        self.discarded = []
+        self._lock = threading.Lock()
+
+    def ingest_file(self, path, progress, domain=None):
+        with self._lock:
+            self.runs.append(path)
+            if self.failures:
+                self.failures -= 1
+                raise ValueError("boom")
+        progress(pages_parsed=1, pages_total=1)
+        if self.fail_when_released:
+            self.fail_when_released.wait()
+            raise ValueError("boom")
+        for i in range(self.steps):
+            time.sleep(self.delay)
+            progress(chunks_embedded=i + 1, chunks_total=self.steps)
+
+    def ingest_url(self, url, progress, domain=None):
+        self.ingest_file(url, progress, domain)
+
+    def discard(self, source, domain=None):
+        self.discarded.append((source, domain))
+
+
+def wait_for(queue, job_id, statuses, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = next(job for job in queue.get_jobs() if job["id"] == job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} never reached {statuses}, last status {job['status']}")
+
+
+def make_queue(tmp_path, ingestor, workers=1, max_retries=2):
+    queue = IngestionQueue(ingestor, str(tmp_path / "jobs.sqlite"), workers=workers, max_retries=max_retries)
+    queue.start()
+    return queue
+
+
+def test_job_reports_progress_and_finishes(tmp_path):
+    queue = make_queue(tmp_path, FakeIngestor())
+    job_id = queue.submit("file", "a.pdf")
+
+    job = wait_for(queue, job_id, [JobStatus.DONE])
+    assert job["pages_parsed"] == 1
+    assert job["chunks_embedded"] == job["chunks_total"] == 4
+
+
+def test_submit_deduplicates_active_jobs(tmp_path):
+    queue = make_queue(tmp_path, FakeIngestor(), workers=0)
+    job_id = queue.submit("file", "a.pdf")
+
+    assert queue.submit("file", "a.pdf") == job_id
+    assert queue.submit("file", "a.pdf", "legal") != job_id
+
+
+def test_has_job_ignores_domain_and_state(tmp_path):
+    queue = make_queue(tmp_path, FakeIngestor(), workers=0)
+    job_id = queue.submit("file", "a.pdf", "legal")
+
+    assert queue.has_job("a.pdf")
+    assert not queue.has_job("b.pdf")
+    queue.cancel(job_id)
+    assert queue.has_job("a.pdf")
+
+
+def test_submit_normalizes_domain(tmp_path):
+    queue = make_queue(tmp_path, FakeIngestor(), workers=0)
+    job_id = queue.submit("file", "a.pdf", "Legal ")
+
+    assert queue.submit("file", "a.pdf", " legal") == job_id
+    assert queue.submit("file", "b.pdf", "  ") == queue.submit("file", "b.pdf")
+    assert queue.get_jobs()[-1]["domain"] == "legal"
+
+
+def test_failed_job_is_retried_until_max_retries(tmp_path):
+    ingestor = FakeIngestor(failures=10)
+    queue = make_queue(tmp_path, ingestor, max_retries=2)
+    job_id = queue.submit("file", "a.pdf")
+
+    job = wait_for(queue, job_id, [JobStatus.FAILED])
+    assert job["attempts"] == 3
+    assert job["error"] == "boom"
+
+    ingestor.failures = 0
+    queue.retry(job_id)
+    assert wait_for(queue, job_id, [JobStatus.DONE])["error"] is None
+
+
+def test_cancel_queued_job(tmp_path):
+    queue = make_queue(tmp_path, FakeIngestor(), workers=0)
+    job_id = queue.submit("file", "a.pdf")
+
+    queue.cancel(job_id)
+    assert wait_for(queue, job_id, [JobStatus.CANCELLED])["attempts"] == 0
+
+
+def test_cancel_reaches_job_running_in_another_queue(tmp_path):
+    ingestor = FakeIngestor(steps=50)
+    runner = make_queue(tmp_path, ingestor)
+    job_id = runner.submit("file", "a.pdf")
+    wait_for(runner, job_id, [JobStatus.RUNNING])
+
+    other = IngestionQueue(FakeIngestor(), str(tmp_path / "jobs.sqlite"), workers=0)
+    other.cancel(job_id)
+
+    job = wait_for(runner, job_id, [JobStatus.CANCELLED, JobStatus.DONE])
+    assert job["status"] == JobStatus.CANCELLED
+    assert job["chunks_embedded"] < 50
+
+
+def test_cancel_survives_failure_after_cancel(tmp_path):
+    release = threading.Event()
+    ingestor = FakeIngestor(fail_when_released=release)
+    runner = make_queue(tmp_path, ingestor)
+    job_id = runner.submit("file", "a.pdf", "legal")
+    wait_for(runner, job_id, [JobStatus.RUNNING])
+
+    other = IngestionQueue(FakeIngestor(), str(tmp_path / "jobs.sqlite"), workers=0)
+    other.cancel(job_id)
+    release.set()
+
+    job = wait_for(runner, job_id, [JobStatus.CANCELLED, JobStatus.DONE, JobStatus.FAILED])
+    time.sleep(0.2)
+    assert job["status"] == JobStatus.CANCELLED
+    assert ingestor.runs == ["a.pdf"]
+    assert ingestor.discarded == [("a.pdf", "legal")]
+
+
+def test_cancelled_job_discards_landed_batches(tmp_path):
+    ingestor = FakeIngestor(steps=50)
+    queue = make_queue(tmp_path, ingestor)
+    job_id = queue.submit("file", "a.pdf")
+    wait_for(queue, job_id, [JobStatus.RUNNING])
+
+    queue.cancel(job_id)
+    wait_for(queue, job_id, [JobStatus.CANCELLED])
+    assert ingestor.discarded == [("a.pdf", None)]
+
+
+def test_retry_after_cancel_runs_again(tmp_path):
+    ingestor = FakeIngestor(steps=50)
+    queue = make_queue(tmp_path, ingestor)
+    job_id = queue.submit("file", "a.pdf")
+    wait_for(queue, job_id, [JobStatus.RUNNING])
+    queue.cancel(job_id)
+    wait_for(queue, job_id, [JobStatus.CANCELLED])
+
+    ingestor.steps = 2
+    queue.retry(job_id)
+    assert wait_for(queue, job_id, [JobStatus.DONE])["cancel_requested"] == 0
+
+
+def test_cancel_all_waits_for_running_jobs(tmp_path):
+    queue = make_queue(tmp_path, FakeIngestor(steps=50))
+    running = queue.submit("file", "a.pdf")
+    queued = queue.submit("file", "b.pdf")
+    wait_for(queue, running, [JobStatus.RUNNING])
+
+    queue.cancel_all()
+    statuses = {job["id"]: job["status"] for job in queue.get_jobs()}
+    assert statuses == {running: JobStatus.CANCELLED, queued: JobStatus.CANCELLED}
+
+
+def test_claim_is_exclusive_across_queues(tmp_path):
+    first = IngestionQueue(FakeIngestor(), str(tmp_path / "jobs.sqlite"), workers=0)
+    second = IngestionQueue(FakeIngestor(), str(tmp_path / "jobs.sqlite"), workers=0)
+    job_id = first.submit("file", "a.pdf")
+
+    assert first._claim_next()["id"] == job_id
+    assert second._claim_next() is None
+
+
+def test_new_queue_does_not_requeue_running_jobs(tmp_path):
+    ingestor = FakeIngestor(steps=20)
+    runner = make_queue(tmp_path, ingestor)
+    job_id = runner.submit("file", "a.pdf")
+    wait_for(runner, job_id, [JobStatus.RUNNING])
+
+    # a second session opening the same database must not steal the running job
+    make_queue(tmp_path, ingestor)
+    job = wait_for(runner, job_id, [JobStatus.DONE])
+    assert job["attempts"] == 1
+    assert ingestor.runs == ["a.pdf"]
+
+
+def test_orphaned_jobs_are_requeued(tmp_path):
+    queue = IngestionQueue(FakeIngestor(), str(tmp_path / "jobs.sqlite"), workers=0)
+    job_id = queue.submit("file", "a.pdf")
+    queue._claim_next()
+
+    queue.requeue_orphaned_jobs()
+    assert queue.get_jobs()[0]["status"] == JobStatus.QUEUED
+    assert queue._claim_next()["id"] == job_id
+
+
+def test_orphaned_job_with_pending_cancel_is_cancelled(tmp_path):
+    queue = IngestionQueue(FakeIngestor(), str(tmp_path / "jobs.sqlite"), workers=0)
+    job_id = queue.submit("file", "a.pdf")
+    queue._claim_next()
+    queue.cancel(job_id)
+
+    queue.requeue_orphaned_jobs()
+    assert queue.get_jobs()[0]["status"] == JobStatus.CANCELLED
+    assert queue._claim_next() is None
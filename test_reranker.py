@@ -0,0 +1,92 @@
+import time
+
+from reranker import CrossEncoderReranker
+
+
+class FakeDocument:
+    def __init__(self, text, chunk_id=None):
+        self.page_content = text
+        self.metadata = {"id": chunk_id or text}
+
+
+class FakeCrossEncoder:
+    """Scores a pair by the length of the document text and records every batch it was asked to score."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+
+    def predict(self, pairs):
+        self.batches.append([doc for _, doc in pairs])
+        time.sleep(self.delay)
+        return [float(len(doc)) for _, doc in pairs]
+
+
+def make_results(*texts):
+    # similarity_search returns (document, distance) pairs, best first
+    return [(FakeDocument(text), distance) for distance, text in enumerate(texts)]
+
+
+def texts(reranked):
+    return [doc.page_content for doc, _ in reranked]
+
+
+def test_returns_best_scored_top_k():
+    reranker = CrossEncoderReranker(batch_size=2, model=FakeCrossEncoder())
+
+    reranked = reranker.rerank("q", make_results("a", "aaaaa", "aaa", "aa"), top_k=2)
+    assert texts(reranked) == ["aaaaa", "aaa"]
+    assert [score for _, score in reranked] == [5.0, 3.0]
+
+
+def test_candidates_are_scored_in_batches():
+    model = FakeCrossEncoder()
+    reranker = CrossEncoderReranker(batch_size=2, model=model)
+
+    reranker.rerank("q", make_results("a", "bb", "ccc", "dddd", "eeeee"))
+    assert model.batches == [["a", "bb"], ["ccc", "dddd"], ["eeeee"]]
+
+
+def test_first_batch_is_scored_even_without_budget():
+    model = FakeCrossEncoder()
+    reranker = CrossEncoderReranker(batch_size=2, latency_budget=-1, model=model)
+
+    reranked = reranker.rerank("q", make_results("a", "bbb", "cc", "dddd"), top_k=4)
+    assert model.batches == [["a", "bbb"]]
+    # unscored candidates keep their vector store order behind the scored ones
+    assert texts(reranked) == ["bbb", "a", "cc", "dddd"]
+    assert [score for _, score in reranked] == [3.0, 1.0, None, None]
+
+
+def test_budget_stops_scoring_after_it_is_spent():
+    model = FakeCrossEncoder(delay=0.05)
+    reranker = CrossEncoderReranker(batch_size=1, latency_budget=0.12, model=model)
+
+    reranked = reranker.rerank("q", make_results("a", "bb", "ccc", "dddd", "eeeee", "ffffff"), top_k=6)
+    assert 1 < len(model.batches) < 6
+    scored = len(model.batches)
+    assert [score is None for _, score in reranked] == [False] * scored + [True] * (6 - scored)
+
+
+def test_scores_are_cached_per_query_and_chunk():
+    model = FakeCrossEncoder()
+    reranker = CrossEncoderReranker(batch_size=10, model=model)
+    results = make_results("a", "bb", "ccc")
+
+    reranker.rerank("q", results)
+    reranker.rerank("q", results + make_results("dddd"))
+    reranker.rerank("other", results)
+    assert model.batches == [["a", "bb", "ccc"], ["dddd"], ["a", "bb", "ccc"]]
+
+
+def test_cache_evicts_least_recently_used():
+    model = FakeCrossEncoder()
+    reranker = CrossEncoderReranker(batch_size=10, cache_size=2, model=model)
+
+    reranker.rerank("q", make_results("a", "bb"))
+    reranker.rerank("q", make_results("a"))  # touches "a", so "bb" is now the oldest entry
+    reranker.rerank("q", make_results("ccc"))
+    assert list(reranker.cache) == [("q", "a"), ("q", "ccc")]
+
+    reranker.rerank("q", make_results("bb"))
+    assert model.batches[-1] == ["bb"]
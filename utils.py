@@ -23,4 +23,14 @@ def normalize_numbers(query: str) -> str:
     return query
 
 def _build_context(results):
-    return "\n\n---\n\n".join([doc.page_content for doc, _ in results])
\ No newline at end of file
+    return "\n\n---\n\n".join([doc.page_content for doc, _ in results])
+
+def normalize_domain(domain):
+    """
+    Normalizes a user-entered domain to the key of its partition: surrounding whitespace is stripped, inner
+    whitespace collapsed and case ignored. An empty domain becomes None, the default partition.
+    """
+    if domain is None:
+        return None
+    domain = " ".join(domain.split()).lower()
+    return domain or None
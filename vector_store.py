@@ -1,15 +1,29 @@
+import hashlib
 import os
+import re
 import shutil
+import sqlite3
+import threading
 
 from langchain_core.embeddings import Embeddings
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
-from langchain_chroma import Chroma
 from config import Config
+from utils import normalize_domain
 
 
 class HuggingFaceEmbeddingAdapter(Embeddings):
-    def __init__(self, embedding_model):
-        self.embedding_model = embedding_model
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self._embedding_model = None
+        self._lock = threading.Lock()
+
+    @property
+    def embedding_model(self):
+        # listing sources or jobs does not need embeddings, so the model is loaded on the first embed call
+        with self._lock:
+            if self._embedding_model is None:
+                from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+                self._embedding_model = HuggingFaceEmbedding(model_name=self.model_name)
+            return self._embedding_model
 
     def embed_documents(self, texts: list[str]) -> list[list[float]]:
         return self.embedding_model.get_text_embedding_batch(texts)
@@ -17,23 +31,164 @@ class HuggingFaceEmbeddingAdapter(Embeddings):
     def embed_query(self, text: str) -> list[float]:
         return self.embedding_model.get_text_embedding(text)
 
-class VectorStoreManager:
+class ParentStore:
+    """
+    Keeps the text of parent spans for the parent/child chunk layout.
+    Parents are never embedded, so they live in sqlite next to the chroma collections instead of inside them.
+    Spans are keyed by domain and parent id, because the same file ingested into two domains yields the same ids.
+    """
+
     def __init__(self, db_path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS parent_spans "
+                "(domain TEXT NOT NULL, id TEXT NOT NULL, content TEXT NOT NULL, PRIMARY KEY (domain, id))"
+            )
+            # spans stored before domains existed all belong to the default partition
+            tables = {row[0] for row in self._conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            if "parents" in tables:
+                self._conn.execute("INSERT OR IGNORE INTO parent_spans SELECT '', id, content FROM parents")
+                self._conn.execute("DROP TABLE parents")
+
+    @staticmethod
+    def _domain_key(domain):
+        return domain or ""
+
+    def save(self, domain, parents):
+        rows = [(self._domain_key(domain), parent_id, content) for parent_id, content in parents.items()]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO parent_spans (domain, id, content) VALUES (?, ?, ?)", rows)
+
+    def get(self, domain, parent_ids):
+        parent_ids = list(parent_ids)
+        placeholders = ", ".join("?" for _ in parent_ids)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, content FROM parent_spans WHERE domain = ? AND id IN ({placeholders})",
+                [self._domain_key(domain), *parent_ids]
+            )
+            return dict(rows.fetchall())
+
+    def delete(self, domain, parent_ids):
+        rows = [(self._domain_key(domain), parent_id) for parent_id in parent_ids]
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM parent_spans WHERE domain = ? AND id = ?", rows)
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM parent_spans")
+
+    def expand(self, results):
+        """Replace child chunks with their parent spans, keeping the best score of each parent."""
+        from langchain_core.documents import Document
+
+        # results of a cross-domain search can point at parents of several domains
+        wanted = {}
+        for doc, _ in results:
+            if doc.metadata.get("parent_id"):
+                wanted.setdefault(doc.metadata.get("domain"), set()).add(doc.metadata["parent_id"])
+        if not wanted:
+            return results
+        parents = {}
+        for domain, parent_ids in wanted.items():
+            for parent_id, content in self.get(domain, parent_ids).items():
+                parents[(domain, parent_id)] = content
+
+        expanded = []
+        seen = set()
+        for doc, score in results:
+            domain = doc.metadata.get("domain")
+            key = (domain, doc.metadata.get("parent_id"))
+            if key not in parents:
+                expanded.append((doc, score))
+                continue
+            if key in seen:
+                continue
+            seen.add(key)
+            chunk_id = f"{domain}:{key[1]}" if domain else key[1]
+            expanded.append((Document(page_content=parents[key], metadata={**doc.metadata, "id": chunk_id}), score))
+        return expanded
+
+class VectorStoreManager:
+    """
+    Chroma storage partitioned by domain.
+
+    Every domain gets its own collection, so a search only walks the index of the active domain. Documents ingested
+    without a domain live in the original "<db_path>_chroma" collection, which stays available as self.vector_store.
+    """
+
+    def __init__(self, db_path, embedding_function=None):
+        import chromadb
+
         self.db_path = db_path
-        self.embedding_model = HuggingFaceEmbedding(model_name="BAAI/bge-base-en-v1.5")
-        self.vector_store = Chroma(
-            collection_name=(db_path + "_chroma"),
-            persist_directory=self.db_path,
-            embedding_function=HuggingFaceEmbeddingAdapter(self.embedding_model)
-        )
+        # managers may share one adapter, so the model is loaded once for all of them
+        self.embedding_function = embedding_function or HuggingFaceEmbeddingAdapter(Config.EMBEDDING_MODEL)
+        self.client = chromadb.PersistentClient(path=self.db_path)
+        self._collections = {}
+        self._collections_lock = threading.Lock()
+        self.vector_store = self.get_collection(None)
+        self.parent_store = ParentStore(db_path + "_parents.sqlite")
+
+    def collection_name(self, domain):
+        key = normalize_domain(domain)
+        if key is None:
+            return self.db_path + "_chroma"
+        # chroma only allows short alphanumeric names, the hash keeps domains that slugify alike apart
+        slug = re.sub(r"[^a-z0-9]+", "_", key).strip("_")[:24]
+        digest = hashlib.sha1(key.encode()).hexdigest()[:8]
+        return f"{self.db_path}_{slug}_{digest}_chroma"
+
+    @property
+    def embedding_model(self):
+        return self.embedding_function.embedding_model
+
+    def get_collection(self, domain):
+        return self._get_collection_by_name(self.collection_name(domain))
+
+    def _get_collection_by_name(self, name):
+        from langchain_chroma import Chroma
+
+        with self._collections_lock:
+            if name not in self._collections:
+                self._collections[name] = Chroma(
+                    client=self.client,
+                    collection_name=name,
+                    embedding_function=self.embedding_function
+                )
+            return self._collections[name]
+
+    def all_collections(self):
+        """All partitions of this database, including ones created by earlier sessions."""
+        names = {getattr(collection, "name", collection) for collection in self.client.list_collections()}
+        names.add(self.collection_name(None))
+        return [self._get_collection_by_name(name) for name in sorted(names)
+                if name.startswith(self.db_path + "_") and name.endswith("_chroma")]
 
     # a solution that would check unique files was inspired by https://github.com/pixegami/rag-tutorial-v2/blob/main/populate_database.py
-    def add_documents(self, documents):
+    def add_documents(self, documents, batch_size=None, on_batch=None, domain=None):
+        domain = normalize_domain(domain)
+        vector_store = self.get_collection(domain)
+        for doc in documents:
+            if domain:
+                doc.metadata["domain"] = domain
+
         # Calculate chunk IDs for the documents
         chunks_with_ids = self.calculate_chunk_ids(documents)
+        self._remove_chunks_of_other_chunkers(vector_store, domain, chunks_with_ids)
+
+        # parent spans of the parent/child layout are stored aside, only the children go into chroma
+        parents = {}
+        for doc in documents:
+            parent_content = doc.metadata.pop("parent_content", None)
+            if parent_content is not None:
+                parents[doc.metadata["parent_id"]] = parent_content
+        if parents:
+            self.parent_store.save(domain, parents)
 
         # Load the existing database and check for already existing IDs
-        existing_items = self.vector_store.get(include=[])  # Get all existing IDs
+        existing_items = vector_store.get(include=[])  # Get all existing IDs
         existing_ids = set(existing_items["ids"])
         print(f"Number of existing documents in DB: {len(existing_ids)}")
 
@@ -45,16 +200,66 @@ class VectorStoreManager:
 
         if new_chunks:
             print(f"👉 Adding new documents: {len(new_chunks)}")
-            new_chunk_ids = [chunk.metadata["id"] for chunk in new_chunks]
-            self.vector_store.add_documents(new_chunks, ids=new_chunk_ids)
+            batch_size = batch_size or len(new_chunks)
+            for start in range(0, len(new_chunks), batch_size):
+                batch = new_chunks[start:start + batch_size]
+                batch_ids = [chunk.metadata["id"] for chunk in batch]
+                vector_store.add_documents(batch, ids=batch_ids)
+                if on_batch:
+                    on_batch(len(batch), len(new_chunks))
         else:
             print("✅  No new documents to add")
 
-    def similarity_search(self, query, k=5):
-        try:
-            return self.vector_store.similarity_search_with_score(query, k=k)
-        except Exception:
-            return []
+    def _remove_chunks_of_other_chunkers(self, vector_store, domain, chunks):
+        """
+        Drop chunks of the same sources that a different chunker produced earlier, so re-ingesting a file after
+        switching Config.CHUNKER replaces its chunks instead of mixing old and new ones.
+        """
+        chunkers_by_source = {}
+        for chunk in chunks:
+            chunkers_by_source.setdefault(chunk.metadata.get("source"), set()).add(chunk.metadata.get("chunker"))
+
+        for source, chunkers in chunkers_by_source.items():
+            if source is None:
+                continue
+            existing = vector_store.get(where={"source": source}, include=["metadatas"])
+            # chunks from before chunkers were pluggable carry no name and came from the character splitter
+            stale = [(chunk_id, metadata) for chunk_id, metadata in zip(existing["ids"], existing["metadatas"])
+                     if metadata.get("chunker", "character") not in chunkers]
+            if stale:
+                print(f"Removing {len(stale)} chunks of {source} made by a different chunker")
+                self._delete_chunks(vector_store, domain, stale)
+
+    def _delete_chunks(self, vector_store, domain, chunks):
+        """Delete (id, metadata) chunks from the collection together with the parent spans they point to."""
+        vector_store.delete(ids=[chunk_id for chunk_id, _ in chunks])
+        parent_ids = {metadata["parent_id"] for _, metadata in chunks if metadata.get("parent_id")}
+        if parent_ids:
+            self.parent_store.delete(domain, parent_ids)
+
+    def delete_source(self, source, domain=None):
+        """Delete all chunks of source, and the parent spans they point to, from the domain's partition."""
+        domain = normalize_domain(domain)
+        vector_store = self.get_collection(domain)
+        existing = vector_store.get(where={"source": source}, include=["metadatas"])
+        if existing["ids"]:
+            print(f"Removing {len(existing['ids'])} chunks of {source}")
+            self._delete_chunks(vector_store, domain, list(zip(existing["ids"], existing["metadatas"])))
+
+    def similarity_search(self, query, k=5, domain=None, all_domains=False):
+        """Search the partition of the given domain, or every partition when all_domains is set."""
+        collections = self.all_collections() if all_domains else [self.get_collection(domain)]
+        # embed the query once instead of once per partition
+        query_vector = self.embedding_function.embed_query(query)
+        results = []
+        for vector_store in collections:
+            try:
+                results.extend(vector_store.similarity_search_by_vector_with_relevance_scores(query_vector, k=k))
+            except Exception:
+                continue
+        # all partitions share one embedding model, so distances are comparable across them
+        results = sorted(results, key=lambda result: result[1])[:k]
+        return self.parent_store.expand(results)
 
     def clear(self):
         if self.db_path == Config.DB_PATH:
@@ -66,15 +271,18 @@ class VectorStoreManager:
                 src_file = os.path.join(Config.DATA_PATH, file_name)
                 dst_file = os.path.join(Config.UNUSED_DATA_PATH, file_name)
                 shutil.move(src_file, dst_file)
-        self.vector_store.reset_collection()
+        for vector_store in self.all_collections():
+            vector_store.reset_collection()
+        self.parent_store.clear()
 
     def calculate_chunk_ids(self, chunks):
         """
         Generate unique chunk IDs based on the source, page number, and chunk index.
         """
 
-        # This will create IDs like "data/monopoly.pdf:6:2"
-        # Page Source : Page Number : Chunk Index
+        # This will create IDs like "data/monopoly.pdf:6:2", or "data/monopoly.pdf:6:structure:2"
+        # Page Source : Page Number : [Chunker :] Chunk Index
+        # The character splitter keeps the original format so existing databases stay valid
 
         last_page_id = None
         current_chunk_index = 0
@@ -91,7 +299,11 @@ class VectorStoreManager:
                 current_chunk_index = 0
 
             # Calculate the chunk ID.
-            chunk_id = f"{current_page_id}:{current_chunk_index}"
+            chunker = chunk.metadata.get("chunker")
+            if chunker and chunker != "character":
+                chunk_id = f"{current_page_id}:{chunker}:{current_chunk_index}"
+            else:
+                chunk_id = f"{current_page_id}:{current_chunk_index}"
             last_page_id = current_page_id
 
             # Add the chunk ID to the chunk's metadata.
@@ -100,16 +312,17 @@ class VectorStoreManager:
         return chunks
 
 
-    def get_sources(self):
-        all_data = self.vector_store.get(include=["metadatas"])
+    def get_sources(self, domain=None, all_domains=False):
+        collections = self.all_collections() if all_domains else [self.get_collection(domain)]
 
         # Extract sources from metadata
         sources = set()
-        for metadata in all_data["metadatas"]:
-            source = metadata.get("source")
-            if source:
-                sources.add(source)
-            else:
-                sources.add("unknown source")
+        for vector_store in collections:
+            for metadata in vector_store.get(include=["metadatas"])["metadatas"]:
+                source = metadata.get("source")
+                if source:
+                    sources.add(source)
+                else:
+                    sources.add("unknown source")
 
         return sources if sources else ["vector base is empty"]